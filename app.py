@@ -10,7 +10,12 @@ from xml.etree import ElementTree
 import re
 import html
 import os
-import json
+import threading
+
+from src.export import export_deliverables
+from src.utils import parse_pub_dates
+from src.shared_cache import current_snapshot_version, publish_snapshot, read_snapshot
+from src.anomaly import FEED_PATH, load_anomaly_feed
 
 # Configuração da página
 st.set_page_config(
@@ -35,42 +40,6 @@ st.markdown("""
 st.markdown('<h1 class="main-header">🤖 Monitoramento de IA no Piauí</h1>', unsafe_allow_html=True)
 st.markdown("---")
 
-# Funções para gerar arquivos CSV/JSON (ENTREGÁVEIS OBRIGATÓRIOS)
-def generate_output_files(df):
-    """
-    Gera os arquivos de output obrigatórios do case
-    """
-    try:
-        # Criar diretório se não existir
-        os.makedirs('data', exist_ok=True)
-        
-        # 1. Salvar CSV (ENTREGÁVEL OBRIGATÓRIO)
-        csv_path = 'processed_news.csv'
-        df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-        print(f"✅ CSV salvo: {csv_path}")
-        
-        # 2. Salvar JSON (opcional)
-        json_path = 'data/processed_news.json'
-        json_data = {
-            "metadata": {
-                "generated_at": datetime.now().isoformat(),
-                "total_news": len(df),
-                "source": "Google News RSS",
-                "query": "Inteligência Artificial Piauí"
-            },
-            "data": df.to_dict(orient='records')
-        }
-        
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
-        print(f"✅ JSON salvo: {json_path}")
-        
-        return csv_path, json_path
-        
-    except Exception as e:
-        print(f"❌ Erro ao gerar arquivos: {e}")
-        return None, None
-
 # Funções para buscar e processar notícias
 def fetch_news_rss(search_query, num_news=15):
     """
@@ -183,8 +152,32 @@ def analyze_sentiment(text):
         return "neutro"
 
 # Carregar dados
-@st.cache_data
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_shared_snapshot(version):
+    """
+    Mapeia o snapshot publicado pelo pipeline. cache_resource devolve o
+    mesmo objeto para todas as sessões, sem serializar/copiar o DataFrame.
+    """
+    return read_snapshot(version)
+
 def load_data():
+    """
+    Usa o snapshot compartilhado quando existe; caso contrário busca os dados
+    """
+    version = current_snapshot_version()
+    if version:
+        return load_shared_snapshot(version)
+    return load_live_data()
+
+@st.cache_data(show_spinner=False)
+def load_anomalies(mtime):
+    """
+    Lê o feed de anomalias calculado pelo pipeline (recarrega quando o arquivo muda)
+    """
+    return pd.DataFrame(load_anomaly_feed())
+
+@st.cache_data
+def load_live_data():
     try:
         # Buscar notícias reais
         news_list = fetch_news_rss("IA Piauí", 15)
@@ -210,20 +203,19 @@ def load_data():
         
         df = pd.DataFrame(processed_news)
         
-        # Adicionar datas fictícias para compatibilidade com seu dashboard
+        # Data de publicação real (o snapshot é servido a todas as réplicas)
         if len(df) > 0:
-            df['data'] = pd.date_range(
-                start=pd.to_datetime('2024-01-01'), 
-                periods=len(df), 
-                freq='D'
-            )
+            df['data'] = parse_pub_dates(df['pubDate'])
         
-        # GERAR ARQUIVOS DE OUTPUT (ENTREGÁVEL OBRIGATÓRIO)
+        # GERAR ARQUIVOS DE OUTPUT (ENTREGÁVEL OBRIGATÓRIO) quando o dashboard
+        # roda sem o pipeline; em segundo plano para não atrasar a renderização
+        threading.Thread(target=export_deliverables, args=(df,), daemon=True).start()
+        
+        # Publicar snapshot para que as outras réplicas não refaçam a busca
         try:
-            csv_path, json_path = generate_output_files(df)
-            print(f"📊 Arquivos do case gerados: {csv_path}")
+            publish_snapshot(df)
         except Exception as e:
-            print(f"⚠️ Erro ao gerar arquivos do case: {e}")
+            print(f"⚠️ Erro ao publicar snapshot: {e}")
         
         return df
         
@@ -285,13 +277,6 @@ def load_data():
         }
         df = pd.DataFrame(data)
         
-        # GERAR ARQUIVOS DE OUTPUT TAMBÉM NO MODO FALLBACK
-        try:
-            csv_path, json_path = generate_output_files(df)
-            print(f"📊 Arquivos do case gerados (fallback): {csv_path}")
-        except Exception as e:
-            print(f"⚠️ Erro ao gerar arquivos do case (fallback): {e}")
-        
         # Selecionar apenas 15 notícias para manter o padrão
         return df.head(15)
 
@@ -303,8 +288,8 @@ st.sidebar.header("🎛️ Filtros Avançados")
 # Filtro por sentimento
 sentimentos = st.sidebar.multiselect(
     "Filtrar por Sentimento:",
-    options=df['sentiment'].unique(),
-    default=df['sentiment'].unique()
+    options=list(df['sentiment'].unique()),
+    default=list(df['sentiment'].unique())
 )
 
 # Filtro por data (se disponível)
@@ -479,9 +464,30 @@ with tab4:
         with col1:
             st.metric("Período Total", f"{(df_filtered['data'].max() - df_filtered['data'].min()).days} dias")
         with col2:
-            st.metric("Média Semanal", f"{len(df_filtered) / ((df_filtered['data'].max() - df_filtered['data'].min()).days / 7):.1f} notícias/semana")
+            # Pelo menos 1 dia, para quando todas as notícias são do mesmo dia
+            period_days = max((df_filtered['data'].max() - df_filtered['data'].min()).days, 1)
+            st.metric("Média Semanal", f"{len(df_filtered) / (period_days / 7):.1f} notícias/semana")
     else:
         st.info("Dados temporais não disponíveis para análise")
+    
+    # Alertas de picos de cobertura negativa (calculados pelo processamento)
+    st.subheader("🚨 Alertas de Sentimento Negativo")
+    feed_mtime = os.path.getmtime(FEED_PATH) if os.path.exists(FEED_PATH) else 0
+    anomalies = load_anomalies(feed_mtime)
+    
+    if anomalies.empty:
+        st.info("Nenhum pico de notícias negativas detectado")
+    else:
+        anomalies = anomalies.rename(columns={
+            'day': 'Dia', 'query': 'Busca', 'source': 'Fonte', 'count': 'Negativas',
+            'expected': 'Esperado', 'zscore': 'z-score', 'provisional': 'Provisório'
+        })
+        anomalies['Fonte'] = anomalies['Fonte'].replace('*', 'Todas')
+        st.dataframe(
+            anomalies[['Dia', 'Busca', 'Fonte', 'Negativas', 'Esperado', 'z-score', 'Provisório']],
+            use_container_width=True,
+            hide_index=True
+        )
 
 # Rodapé com aviso de limitações
 st.markdown("---")
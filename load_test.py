@@ -0,0 +1,350 @@
+"""
+Teste de carga ponta a ponta: servidor RSS falso -> run_pipeline -> dashboard
+
+Uso:
+    python load_test.py --items-per-query 300 --latency-ms 200 --sessions 50 --concurrency 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import urlopen
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Vocabulário para gerar notícias com sentimentos variados
+POSITIVE_TERMS = ["inovação", "crescimento", "investimento", "oportunidade", "sucesso"]
+NEGATIVE_TERMS = ["risco", "problema", "preocupação", "crítica", "prejuízo"]
+NEUTRAL_TERMS = ["evento", "reunião", "palestra", "encontro", "anúncio"]
+SOURCES = ["G1 Piauí", "Cidade Verde", "O Dia", "Meio Norte", "GP1", "Agência Gov"]
+
+
+def generate_feed(query, items, days):
+    """
+    Gera um RSS no formato do Google News com notícias fictícias da query
+    """
+    rng = random.Random(query)
+    now = datetime.now(timezone.utc)
+    entries = []
+
+    for i in range(items):
+        term = rng.choice(POSITIVE_TERMS + NEGATIVE_TERMS + NEUTRAL_TERMS)
+        source = rng.choice(SOURCES)
+        pub_date = now - timedelta(days=rng.randrange(days), minutes=rng.randrange(1440))
+        title = f"{query}: {term} em projeto {i} de IA no Piauí - {source}"
+        description = f'<a href="#">{title}</a> Notícia sobre {term} no estado'
+        entries.append(
+            "<item>"
+            f"<title>{escape(title)}</title>"
+            f"<link>https://example.com/{zlib.crc32(query.encode())}/{i}</link>"
+            f"<pubDate>{format_datetime(pub_date, usegmt=True)}</pubDate>"
+            f"<description>{escape(description)}</description>"
+            f"<source url=\"https://example.com\">{escape(source)}</source>"
+            "</item>"
+        )
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel><title>Fake Google News</title>'
+        + "".join(entries)
+        + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def start_fake_rss_server(items, days, latency_ms):
+    """
+    Sobe um servidor RSS local em uma thread e retorna (servidor, url)
+    """
+    cache = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+            with lock:
+                if query not in cache:
+                    cache[query] = generate_feed(query, items, days)
+                body = cache[query]
+
+            time.sleep(latency_ms / 1000)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/rss/search"
+    return server, url
+
+
+def prepare_workdir():
+    """
+    Cria um diretório de trabalho isolado para não sobrescrever data/ do repositório
+    """
+    workdir = tempfile.mkdtemp(prefix="iapiaui-load-")
+    os.symlink(os.path.join(REPO_DIR, "src"), os.path.join(workdir, "src"))
+    shutil.copy(os.path.join(REPO_DIR, "app.py"), workdir)
+    shutil.copy(os.path.join(REPO_DIR, "run_pipeline.py"), workdir)
+    os.makedirs(os.path.join(workdir, "data"))
+    return workdir
+
+
+def percentile(values, pct):
+    """
+    Percentil por interpolação linear
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_pipeline_stage(rss_url, query_delay):
+    """
+    Executa run_pipeline contra o servidor falso e mede vazão e memória
+    """
+    os.environ["IAPIAUI_RSS_URL"] = rss_url
+    os.environ["IAPIAUI_QUERY_DELAY"] = str(query_delay)
+
+    from run_pipeline import run_pipeline
+
+    timings = run_pipeline()
+    if timings is None:
+        raise RuntimeError("Pipeline falhou durante o teste de carga")
+
+    raw_rows = len(pd.read_csv("data/raw_news.csv"))
+    processed_rows = len(pd.read_csv("data/processed_news.csv"))
+
+    # Entregáveis do case devem ser gerados a cada atualização do pipeline
+    for deliverable in ("processed_news.csv", "data/processed_news.json", "data/processed_news.jsonl"):
+        if not os.path.exists(deliverable):
+            raise RuntimeError(f"Pipeline não gerou o entregável {deliverable}")
+
+    return {
+        "raw_rows": raw_rows,
+        "processed_rows": processed_rows,
+        "collection_seconds": round(timings["collection"], 3),
+        "collection_rows_per_sec": round(raw_rows / timings["collection"], 1),
+        "processing_seconds": round(timings["processing"], 3),
+        "processing_rows_per_sec": round(processed_rows / timings["processing"], 1),
+        # ru_maxrss em KB no Linux: maior pico entre os subprocessos
+        "pipeline_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def run_render_stage(renders):
+    """
+    Executa o app.py dentro deste processo (AppTest) e mede a latência de
+    cada execução do script, sem servidor nem websocket
+    """
+    from streamlit.testing.v1 import AppTest
+
+    latencies = []
+    for _ in range(renders):
+        # Cada AppTest é uma nova sessão, como um novo usuário abrindo o dashboard
+        app = AppTest.from_file("app.py", default_timeout=120)
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(f"Erro ao renderizar o dashboard: {app.exception}")
+
+    return {
+        "inprocess_renders": renders,
+        "inprocess_render_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "inprocess_render_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        # ru_maxrss do próprio processo do teste, onde o AppTest roda
+        "inprocess_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _peak_rss_mb(pid):
+    """
+    Pico de memória (VmHWM) de outro processo; só disponível no Linux
+    """
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+async def _browser_session(ws_url):
+    """
+    Abre uma sessão como o navegador faz: conecta no websocket, pede a
+    execução do script e espera o script_finished. Retorna a latência.
+    """
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from tornado.websocket import websocket_connect
+
+    ws = await websocket_connect(ws_url)
+    try:
+        request = BackMsg()
+        request.rerun_script.query_string = ""
+        request.rerun_script.page_script_hash = ""
+
+        start = time.perf_counter()
+        await ws.write_message(request.SerializeToString(), binary=True)
+
+        while True:
+            payload = await ws.read_message()
+            if payload is None:
+                raise RuntimeError("Servidor fechou a sessão antes do fim do script")
+
+            message = ForwardMsg()
+            message.ParseFromString(payload)
+            msg_type = message.WhichOneof("type")
+
+            if msg_type == "delta" and message.delta.new_element.WhichOneof("type") == "exception":
+                raise RuntimeError(f"Erro ao renderizar o dashboard: {message.delta.new_element.exception.message}")
+            if msg_type == "script_finished":
+                if message.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY:
+                    raise RuntimeError(f"Script terminou com status {message.script_finished}")
+                return time.perf_counter() - start
+    finally:
+        ws.close()
+
+
+async def _run_sessions(ws_url, sessions, concurrency):
+    """
+    Dispara as sessões com no máximo `concurrency` abertas ao mesmo tempo
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await _browser_session(ws_url)
+
+    return await asyncio.gather(*(limited() for _ in range(sessions)))
+
+
+def run_server_stage(sessions, concurrency):
+    """
+    Sobe o servidor Streamlit em modo headless e mede a renderização
+    completa do dashboard em sessões reais pelo websocket /_stcore/stream
+    """
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py",
+         "--server.headless", "true", "--server.port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        # Aguarda o servidor responder
+        deadline = time.time() + 60
+        while True:
+            try:
+                urlopen(f"{base_url}/_stcore/health", timeout=2).read()
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise RuntimeError("Servidor Streamlit não subiu")
+                time.sleep(0.5)
+
+        ws_url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        start = time.perf_counter()
+        latencies = asyncio.run(_run_sessions(ws_url, sessions, concurrency))
+        elapsed = time.perf_counter() - start
+
+        return {
+            "server_sessions": sessions,
+            "server_concurrency": concurrency,
+            "server_render_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "server_render_p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "server_sessions_per_sec": round(sessions / elapsed, 2),
+            "server_peak_rss_mb": _peak_rss_mb(server.pid),
+        }
+
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do pipeline e do dashboard")
+    parser.add_argument("--items-per-query", type=int, default=300,
+                        help="Notícias por query no RSS falso (padrão: ~100x a amostra atual)")
+    parser.add_argument("--days", type=int, default=60, help="Dias cobertos pelas notícias geradas")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Latência artificial do RSS falso")
+    parser.add_argument("--query-delay", type=float, default=0, help="Pausa entre queries na coleta")
+    parser.add_argument("--renders", type=int, default=20, help="Renderizações do dashboard no próprio processo")
+    parser.add_argument("--sessions", type=int, default=50, help="Sessões abertas no servidor Streamlit")
+    parser.add_argument("--concurrency", type=int, default=5, help="Sessões simultâneas no servidor Streamlit")
+    parser.add_argument("--skip-server", action="store_true", help="Não sobe o servidor Streamlit")
+    parser.add_argument("--output", help="Salva o relatório em JSON neste caminho")
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    rss_server, rss_url = start_fake_rss_server(args.items_per_query, args.days, args.latency_ms)
+    workdir = prepare_workdir()
+    print(f"🧪 Diretório do teste: {workdir}")
+    print(f"📡 RSS falso em {rss_url}")
+
+    report = {
+        "items_per_query": args.items_per_query,
+        "latency_ms": args.latency_ms,
+    }
+
+    cwd = os.getcwd()
+    sys.path.insert(0, workdir)
+    os.chdir(workdir)
+    try:
+        report.update(run_pipeline_stage(rss_url, args.query_delay))
+        report.update(run_render_stage(args.renders))
+        if not args.skip_server:
+            report.update(run_server_stage(args.sessions, args.concurrency))
+    finally:
+        os.chdir(cwd)
+        rss_server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n📊 Resultado do teste de carga")
+    for key, value in report.items():
+        print(f"   {key}: {value}")
+
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"💾 Relatório salvo em {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,34 @@
 import subprocess
 import sys
+import time
 
 def run_pipeline():
+    """
+    Executa coleta e processamento; retorna a duração (s) de cada etapa
+    """
     print("🚀 Iniciando pipeline completo...")
+    timings = {}
     
     try:
         # 1. Coleta de dados
         print("📰 Etapa 1: Coletando notícias...")
+        start = time.perf_counter()
         subprocess.run([sys.executable, "src/data_collection.py"], check=True)
+        timings['collection'] = time.perf_counter() - start
         
         # 2. Processamento
         print("⚙️ Etapa 2: Processando dados...")
+        start = time.perf_counter()
         subprocess.run([sys.executable, "src/data_processing.py"], check=True)
+        timings['processing'] = time.perf_counter() - start
         
         print("✅ Pipeline concluído com sucesso!")
         print("🎯 Execute: streamlit run app.py para ver o dashboard")
+        return timings
         
     except subprocess.CalledProcessError as e:
         print(f"❌ Erro no pipeline: {e}")
+        return None
 
 if __name__ == "__main__":
     run_pipeline()
\ No newline at end of file
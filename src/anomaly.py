@@ -0,0 +1,223 @@
+import json
+import math
+from datetime import date, datetime
+
+try:
+    from src.utils import atomic_write_text
+except ImportError:
+    from utils import atomic_write_text
+
+# Arquivos persistidos pelo processamento
+STATE_PATH = 'data/anomaly_state.json'
+FEED_PATH = 'data/anomaly_feed.json'
+
+# Parâmetros do detector (EWMA da contagem diária de notícias negativas)
+EWMA_ALPHA = 0.3
+Z_THRESHOLD = 3.0
+MIN_COUNT = 3
+WARMUP_DAYS = 7
+MIN_STD = 1.0
+MAX_GAP_DAYS = 30
+FEED_MAX_ITEMS = 200
+
+# Série agregada de todas as fontes de uma query
+ALL_SOURCES = '*'
+
+
+def _new_series():
+    """
+    Estado inicial de uma série (query + fonte)
+    """
+    return {'day': None, 'count': 0, 'mean': 0.0, 'var': 0.0, 'n': 0}
+
+
+def _zscore(series, value):
+    """
+    z-score de um valor em relação à média/variância exponenciais
+    """
+    std = max(math.sqrt(series['var']), MIN_STD)
+    return (value - series['mean']) / std
+
+
+def _is_anomaly(series, value, z):
+    """
+    Só alerta após o aquecimento e com um volume mínimo de notícias
+    """
+    return series['n'] >= WARMUP_DAYS and value >= MIN_COUNT and z >= Z_THRESHOLD
+
+
+def _fold(series, value):
+    """
+    Incorpora um balde diário fechado à EWMA em O(1)
+    """
+    if series['n'] == 0:
+        series['mean'] = float(value)
+        series['var'] = 0.0
+    else:
+        diff = value - series['mean']
+        series['mean'] += EWMA_ALPHA * diff
+        series['var'] = (1 - EWMA_ALPHA) * (series['var'] + EWMA_ALPHA * diff * diff)
+    series['n'] += 1
+
+
+def update_series(series, day, count):
+    """
+    Atualiza uma série com a contagem de um dia.
+
+    O dia aberto fica com a maior contagem vista (cada coleta traz de
+    novo as notícias recentes, então não se soma); quando chega um dia
+    mais novo, o dia aberto e os dias sem notícias no intervalo são
+    fechados e incorporados à EWMA. Dias mais antigos que o dia aberto
+    já foram contabilizados e são ignorados.
+    Retorna a lista de alertas dos dias fechados.
+    """
+    alerts = []
+
+    if series['day'] is None:
+        series['day'] = day
+        series['count'] = count
+        return alerts
+
+    current = date.fromisoformat(series['day'])
+    new_day = date.fromisoformat(day)
+
+    if new_day < current:
+        return alerts
+
+    if new_day == current:
+        series['count'] = max(series['count'], count)
+        return alerts
+
+    # Fecha o dia aberto
+    z = _zscore(series, series['count'])
+    if _is_anomaly(series, series['count'], z):
+        alerts.append({'day': series['day'], 'count': series['count'],
+                       'expected': round(series['mean'], 2), 'zscore': round(z, 2)})
+    _fold(series, series['count'])
+
+    # Dias sem notícias negativas entre o aberto e o novo (limitado)
+    gap = min((new_day - current).days - 1, MAX_GAP_DAYS)
+    for _ in range(gap):
+        _fold(series, 0)
+
+    series['day'] = day
+    series['count'] = count
+    return alerts
+
+
+def load_state(path=STATE_PATH):
+    """
+    Carrega o estado do detector como {(query, fonte): série}; arquivo
+    ausente ou corrompido resulta em estado vazio
+    """
+    try:
+        with open(path, encoding='utf-8') as fh:
+            stored = json.load(fh)['series']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"⚠️ Estado de anomalias inválido ({e}), recomeçando do zero")
+        return {}
+
+    # Formato antigo: dicionário com chave "query|fonte" (as queries não têm '|')
+    if isinstance(stored, dict):
+        stored = [dict(series, query=key.split('|', 1)[0], source=key.split('|', 1)[-1])
+                  for key, series in stored.items()]
+
+    state = {}
+    for series in stored:
+        series = dict(series)
+        state[(series.pop('query'), series.pop('source'))] = series
+    return state
+
+
+def save_state(state, path=STATE_PATH):
+    """
+    Salva o estado do detector de forma atômica, com query e fonte em
+    campos separados
+    """
+    series = [dict(values, query=query, source=source) for (query, source), values in state.items()]
+    atomic_write_text(path, json.dumps({'series': series}, ensure_ascii=False))
+
+
+def load_anomaly_feed(path=FEED_PATH):
+    """
+    Lê o feed de anomalias pré-calculado (mais recentes primeiro)
+    """
+    try:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def _daily_negative_counts(df):
+    """
+    Conta notícias negativas por (query, fonte, dia), incluindo a série
+    agregada de todas as fontes de cada query
+    """
+    days = df['data'].dt.strftime('%Y-%m-%d')
+    negative = (df['sentiment'] == 'negativo').astype(int)
+    query = df['search_query'] if 'search_query' in df.columns else ''
+    frame = df.assign(query=query, day=days, negative=negative)
+
+    counts = {}
+    for (q, source, day), value in frame.groupby(['query', 'source', 'day'])['negative'].sum().items():
+        counts[(q, source, day)] = int(value)
+        key = (q, ALL_SOURCES, day)
+        counts[key] = counts.get(key, 0) + int(value)
+
+    return counts
+
+
+def update_anomalies(df, state_path=STATE_PATH, feed_path=FEED_PATH):
+    """
+    Atualiza o detector com um lote processado (colunas do dashboard mais
+    search_query) e grava o feed de anomalias para o dashboard
+    """
+    state = load_state(state_path)
+    feed = load_anomaly_feed(feed_path)
+    detected_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    counts = _daily_negative_counts(df)
+    newest_day = max((day for _, _, day in counts), default=None)
+
+    new_alerts = []
+    # Dias em ordem crescente para que cada balde seja visto uma única vez
+    for (query, source, day), count in sorted(counts.items(), key=lambda item: item[0][2]):
+        series = state.setdefault((query, source), _new_series())
+        for alert in update_series(series, day, count):
+            alert.update({'query': query, 'source': source,
+                          'provisional': False, 'detected_at': detected_at})
+            new_alerts.append(alert)
+
+    # Avaliação provisória do dia ainda aberto (sem alterar a EWMA). Só vale
+    # para séries cujo dia aberto é o mais recente do lote; uma fonte que
+    # parou de publicar não repete o último pico a cada execução
+    provisional = []
+    for (query, source), series in state.items():
+        if series['day'] is None or series['day'] != newest_day:
+            continue
+        z = _zscore(series, series['count'])
+        if _is_anomaly(series, series['count'], z):
+            provisional.append({'day': series['day'], 'count': series['count'],
+                                'expected': round(series['mean'], 2), 'zscore': round(z, 2),
+                                'query': query, 'source': source,
+                                'provisional': True, 'detected_at': detected_at})
+
+    # Alertas provisórios são recalculados a cada execução
+    feed = [item for item in feed if not item.get('provisional')]
+
+    # Um alerta por (dia, query, fonte): o mais recente prevalece, ex. quando
+    # o estado foi perdido e o mesmo dia é fechado de novo
+    unique = {}
+    for item in provisional + new_alerts + feed:
+        unique.setdefault((item['day'], item['query'], item['source']), item)
+    feed = sorted(unique.values(), key=lambda item: item['day'], reverse=True)[:FEED_MAX_ITEMS]
+
+    save_state(state, state_path)
+    atomic_write_text(feed_path, json.dumps(feed, ensure_ascii=False, indent=2))
+
+    if new_alerts or provisional:
+        print(f"🚨 {len(new_alerts) + len(provisional)} alerta(s) de sentimento negativo")
+
+    return feed
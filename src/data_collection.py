@@ -2,40 +2,196 @@ import requests
 import pandas as pd
 import xml.etree.ElementTree as ET
 from datetime import datetime
+from urllib.parse import urlparse
+import os
+import random
+import re
 import time
 
-def fetch_google_news_rss(query="Inteligência Artificial Piauí"):
+try:
+    from src.utils import atomic_write_csv
+except ImportError:
+    from utils import atomic_write_csv
+
+# Endpoint do Google News RSS (pode ser sobrescrito, ex.: servidor fake do load_test.py)
+RSS_BASE_URL = os.environ.get("IAPIAUI_RSS_URL", "https://news.google.com/rss/search")
+
+# Timeouts separados: (conexão, leitura) em segundos. O de leitura vale
+# para cada pacote; REQUEST_TIMEOUT limita a resposta inteira
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 8
+REQUEST_TIMEOUT = 10
+
+# Tempo máximo de um ciclo de coleta (todas as queries). Esgotado o prazo,
+# as queries restantes usam o último checkpoint
+CYCLE_TIMEOUT = 45
+
+# Retentativas com backoff exponencial e jitter
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Circuit breaker por host (conta queries que esgotaram as retentativas)
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = 60
+
+# Pausa entre queries para não sobrecarregar o servidor
+QUERY_DELAY = float(os.environ.get("IAPIAUI_QUERY_DELAY", 2))
+
+# Pasta de checkpoints por query
+CHECKPOINT_DIR = 'data/checkpoints'
+
+# Estado do circuit breaker: host -> {'failures': int, 'opened_at': float | None}
+_circuit_state = {}
+
+def _circuit_allows(host):
     """
-    Coleta notícias do Google News RSS baseado na query
+    Verifica se o circuito do host permite uma nova requisição
     """
-    try:
-        # Formata a query para URL
-        formatted_query = query.replace(" ", "+")
-        url = f"https://news.google.com/rss/search?q={formatted_query}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
-        
-        # Headers para simular navegador
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        # Faz a requisição
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        return response.text
-        
-    except Exception as e:
-        print(f"Erro ao buscar notícias: {e}")
+    state = _circuit_state.get(host)
+    if not state or state['opened_at'] is None:
+        return True
+
+    # Após o tempo de reset, deixa passar uma requisição de teste (half-open)
+    if time.monotonic() - state['opened_at'] >= CIRCUIT_RESET_TIMEOUT:
+        return True
+
+    return False
+
+def _record_success(host):
+    """
+    Fecha o circuito do host após uma requisição bem-sucedida
+    """
+    _circuit_state[host] = {'failures': 0, 'opened_at': None}
+
+def _record_failure(host):
+    """
+    Registra uma query que esgotou as retentativas e abre o circuito
+    ao atingir o limite
+    """
+    state = _circuit_state.setdefault(host, {'failures': 0, 'opened_at': None})
+    state['failures'] += 1
+
+    if state['failures'] >= CIRCUIT_FAILURE_THRESHOLD:
+        if state['opened_at'] is None:
+            print(f"⛔ Circuito aberto para {host} após {state['failures']} falhas")
+        state['opened_at'] = time.monotonic()
+
+def _backoff_delay(attempt):
+    """
+    Calcula o atraso de backoff exponencial com jitter completo
+    """
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+def _read_body(response, deadline):
+    """
+    Lê o corpo da resposta em blocos, abortando se passar do prazo
+    (uma resposta que chega aos poucos não é limitada pelo timeout de leitura)
+    """
+    chunks = []
+    for chunk in response.iter_content(chunk_size=16384):
+        if time.monotonic() > deadline:
+            response.close()
+            raise requests.Timeout(f"Resposta excedeu {REQUEST_TIMEOUT}s")
+        chunks.append(chunk)
+    return b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace')
+
+def fetch_google_news_rss(query="Inteligência Artificial Piauí", deadline=None):
+    """
+    Coleta notícias do Google News RSS baseado na query,
+    com retentativas, timeouts separados e circuit breaker por host.
+    `deadline` (time.monotonic) limita o tempo total gasto com a query.
+    """
+    params = {
+        'q': query,
+        'hl': 'pt-BR',
+        'gl': 'BR',
+        'ceid': 'BR:pt-419'
+    }
+
+    # Headers para simular navegador
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+
+    host = urlparse(RSS_BASE_URL).netloc
+
+    if not _circuit_allows(host):
+        print(f"⛔ Circuito aberto para {host}, pulando: {query}")
         return None
 
+    if deadline is None:
+        deadline = time.monotonic() + (MAX_RETRIES + 1) * REQUEST_TIMEOUT
+
+    for attempt in range(MAX_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"⏱️ Prazo da coleta esgotado, pulando: {query}")
+            return None
+
+        try:
+            with requests.get(
+                RSS_BASE_URL,
+                params=params,
+                headers=headers,
+                timeout=(min(CONNECT_TIMEOUT, remaining),
+                         max(0.1, min(READ_TIMEOUT, remaining - min(CONNECT_TIMEOUT, remaining)))),
+                stream=True
+            ) as response:
+                # Erros transitórios do servidor entram na retentativa
+                if response.status_code in RETRY_STATUS_CODES:
+                    raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+
+                response.raise_for_status()
+                body = _read_body(response, min(deadline, time.monotonic() + REQUEST_TIMEOUT))
+
+            _record_success(host)
+            return body
+
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            status = e.response.status_code if getattr(e, 'response', None) is not None else None
+
+            # Erros 4xx (exceto 429) não adiantam repetir
+            if status is not None and status not in RETRY_STATUS_CODES:
+                print(f"Erro ao buscar notícias: {e}")
+                return None
+
+            if attempt == MAX_RETRIES:
+                _record_failure(host)
+                print(f"Erro ao buscar notícias após {MAX_RETRIES + 1} tentativas: {e}")
+                return None
+
+            delay = _backoff_delay(attempt)
+
+            # Sem tempo para esperar o backoff e tentar de novo
+            if time.monotonic() + delay >= deadline:
+                _record_failure(host)
+                print(f"⏱️ Prazo da coleta esgotado após {attempt + 1} tentativa(s): {e}")
+                return None
+
+            print(f"⚠️ Tentativa {attempt + 1} falhou ({e}). Nova tentativa em {delay:.1f}s")
+            time.sleep(delay)
+
+        except Exception as e:
+            print(f"Erro ao buscar notícias: {e}")
+            return None
+
+    return None
+
 def parse_rss_to_dataframe(xml_content):
     """
-    Converte o XML do RSS para DataFrame
+    Converte o XML do RSS para DataFrame. Retorna None se o conteúdo não
+    for um RSS válido (ex.: página HTML de consentimento ou captcha);
+    um <channel> sem itens resulta em DataFrame vazio.
     """
     try:
         # Parse do XML
         root = ET.fromstring(xml_content)
         
+        if root.find('channel') is None:
+            raise ValueError(f"Resposta não é um RSS (raiz <{root.tag}>)")
+        
         news_data = []
         
         # Namespace do RSS
@@ -48,12 +204,14 @@ def parse_rss_to_dataframe(xml_content):
             link = item.find('link').text if item.find('link') is not None else ''
             pub_date = item.find('pubDate').text if item.find('pubDate') is not None else ''
             description = item.find('description').text if item.find('description') is not None else ''
+            source = item.find('source').text if item.find('source') is not None else ''
             
             news_data.append({
                 'title': title,
                 'link': link,
                 'pub_date': pub_date,
                 'description': description,
+                'source': source,
                 'collected_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             })
         
@@ -61,6 +219,33 @@ def parse_rss_to_dataframe(xml_content):
         
     except Exception as e:
         print(f"Erro ao parsear XML: {e}")
+        return None
+
+def _checkpoint_path(query):
+    """
+    Caminho do checkpoint de uma query
+    """
+    slug = re.sub(r'[^a-z0-9]+', '_', query.lower()).strip('_')
+    return os.path.join(CHECKPOINT_DIR, f"{slug}.csv")
+
+def save_checkpoint(query, df_news):
+    """
+    Salva o resultado de uma query assim que ela é coletada
+    """
+    atomic_write_csv(df_news, _checkpoint_path(query), encoding='utf-8')
+
+def load_checkpoint(query):
+    """
+    Carrega o último resultado salvo de uma query (ou DataFrame vazio)
+    """
+    path = _checkpoint_path(query)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+
+    try:
+        return pd.read_csv(path)
+    except Exception as e:
+        print(f"Erro ao ler checkpoint {path}: {e}")
         return pd.DataFrame()
 
 def collect_news():
@@ -78,24 +263,44 @@ def collect_news():
         "Inovação Piauí"
     ]
     
-    all_news = pd.DataFrame()
+    frames = []
+    failed_queries = []
+    # Prazo do ciclo inteiro: limita a latência mesmo com a rede degradada
+    deadline = time.monotonic() + CYCLE_TIMEOUT
     
-    for query in queries:
+    for i, query in enumerate(queries):
         print(f"Buscando: {query}")
         
         # Coleta do RSS
-        xml_content = fetch_google_news_rss(query)
+        xml_content = fetch_google_news_rss(query, deadline=deadline)
         
-        if xml_content:
-            # Converte para DataFrame
-            df_news = parse_rss_to_dataframe(xml_content)
-            
+        # Converte para DataFrame (None se o conteúdo não for RSS válido)
+        df_news = parse_rss_to_dataframe(xml_content) if xml_content is not None else None
+        
+        if df_news is not None:
             if not df_news.empty:
                 df_news['search_query'] = query
-                all_news = pd.concat([all_news, df_news], ignore_index=True)
+                # Checkpoint da query: persiste mesmo se as próximas falharem
+                save_checkpoint(query, df_news)
+        else:
+            # Requisição falhou ou veio algo que não é RSS: reaproveita o último
+            # resultado bem-sucedido desta query (feed vazio não cai aqui)
+            failed_queries.append(query)
+            df_news = load_checkpoint(query)
+            if not df_news.empty:
+                print(f"♻️ Usando checkpoint anterior para: {query}")
+        
+        if not df_news.empty:
+            frames.append(df_news)
         
-        # Delay para não sobrecarregar
-        time.sleep(2)
+        # Delay para não sobrecarregar (sem estourar o prazo do ciclo)
+        if i < len(queries) - 1:
+            time.sleep(max(0, min(QUERY_DELAY, deadline - time.monotonic())))
+    
+    all_news = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    
+    if failed_queries:
+        print(f"⚠️ Queries sem resposta nesta coleta: {', '.join(failed_queries)}")
     
     # Remove duplicatas
     if not all_news.empty:
@@ -103,7 +308,7 @@ def collect_news():
         print(f"✅ Coletadas {len(all_news)} notícias únicas")
         
         # Salva os dados brutos
-        all_news.to_csv('data/raw_news.csv', index=False, encoding='utf-8')
+        atomic_write_csv(all_news, 'data/raw_news.csv', encoding='utf-8')
         print("💾 Dados salvos em data/raw_news.csv")
         
     return all_news
@@ -3,6 +3,17 @@ import re
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+try:
+    from src.utils import atomic_write_csv, parse_pub_dates
+    from src.shared_cache import publish_snapshot
+    from src.export import export_deliverables
+    from src.anomaly import update_anomalies
+except ImportError:
+    from utils import atomic_write_csv, parse_pub_dates
+    from shared_cache import publish_snapshot
+    from export import export_deliverables
+    from anomaly import update_anomalies
+
 def clean_text(text):
     """
     Limpa o texto removendo tags HTML, caracteres especiais e espaços extras.
@@ -45,6 +56,26 @@ negative_words = ["risco", "ameaça", "desemprego", "problema", "preocupação",
                  "perigo", "vício", "viés", "invasão", "culpa", "crítica",
                  "alerta", "dano", "prejuízo", "retrocesso"]
 
+def build_dashboard_frame(df):
+    """
+    Monta o DataFrame no formato usado pelo dashboard (app.py)
+    """
+    dashboard_df = pd.DataFrame({
+        'title': df['cleaned_title'],
+        'description': df['cleaned_description'],
+        'sentiment': df['sentiment'],
+        'source': df['source'] if 'source' in df.columns else 'Google News',
+        'link': df['link'] if 'link' in df.columns else '#',
+        'pubDate': df['pub_date'] if 'pub_date' in df.columns else '',
+        'search_query': df['search_query'] if 'search_query' in df.columns else ''
+    })
+
+    # Data de publicação (RFC 822 do RSS) agrupada por dia
+    pub_dates = df['pub_date'] if 'pub_date' in df.columns else pd.Series('', index=df.index)
+    dashboard_df['data'] = parse_pub_dates(pub_dates)
+
+    return dashboard_df.fillna('')
+
 def main():
     try:
         # 1. Carregar os dados coletados REAIS
@@ -72,10 +103,23 @@ def main():
     df['processed_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
     # 6. Salvar os dados processados
-    df.to_csv('data/processed_news.csv', index=False, encoding='utf-8')
+    atomic_write_csv(df, 'data/processed_news.csv', encoding='utf-8')
     print("✅ Processamento concluído! Dados salvos em 'data/processed_news.csv'")
     
-    # 7. Mostrar estatísticas
+    # 7. Publicar snapshot compartilhado para os processos do dashboard
+    dashboard_df = build_dashboard_frame(df)
+    try:
+        publish_snapshot(dashboard_df)
+    except Exception as e:
+        print(f"⚠️ Erro ao publicar snapshot: {e}")
+    
+    # GERAR ARQUIVOS DE OUTPUT (ENTREGÁVEL OBRIGATÓRIO), uma vez por atualização
+    export_deliverables(dashboard_df)
+    
+    # 8. Atualizar o detector de anomalias de sentimento negativo
+    update_anomalies(dashboard_df)
+    
+    # 9. Mostrar estatísticas
     print("📈 Distribuição de sentimentos:")
     sentiment_counts = df['sentiment'].value_counts()
     for sentiment, count in sentiment_counts.items():
@@ -0,0 +1,451 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    from src.utils import atomic_write_text
+except ImportError:
+    from utils import atomic_write_text
+
+# Quantidade de linhas mantidas em memória por vez durante a exportação
+EXPORT_CHUNKSIZE = 5000
+
+# Colunas que identificam uma notícia (para anexar só registros novos)
+DEFAULT_KEY_COLUMNS = ['title', 'link']
+
+# Entregáveis do case
+CSV_PATH = 'processed_news.csv'
+JSON_PATH = 'data/processed_news.json'
+JSONL_PATH = 'data/processed_news.jsonl'
+
+# Bytes do início/fim do arquivo guardados no .idx para conferir o conteúdo
+FINGERPRINT_BYTES = 256
+
+# Uma exportação por vez no processo (o módulo é importado uma única vez)
+_export_lock = threading.Lock()
+
+
+def iter_chunks(source, chunksize=EXPORT_CHUNKSIZE):
+    """
+    Percorre a fonte em blocos: aceita um DataFrame ou o caminho de um CSV
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+def _source_columns(source):
+    """
+    Colunas da fonte sem carregá-la inteira
+    """
+    if isinstance(source, pd.DataFrame):
+        return list(source.columns)
+    return list(pd.read_csv(source, nrows=0).columns)
+
+
+def _infer_compression(path, compression):
+    """
+    Define a compressão pelo parâmetro ou pela extensão do arquivo
+    """
+    if compression is not None:
+        return compression
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def _wrap_binary(raw, mode, compression):
+    """
+    Envolve um arquivo binário com o (des)compressor escolhido
+    """
+    if compression is None:
+        return raw
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode=mode)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Compressão zstd requer o pacote 'zstandard' (pip install zstandard)")
+        if 'r' in mode:
+            return zstandard.ZstdDecompressor().stream_reader(raw)
+        return zstandard.ZstdCompressor().stream_writer(raw)
+    raise ValueError(f"Compressão não suportada: {compression}")
+
+
+@contextmanager
+def _open_text_reader(path, compression, encoding='utf-8-sig'):
+    """
+    Abre um arquivo (possivelmente comprimido) para leitura de texto
+    """
+    # GzipFile(fileobj=...) não fecha o arquivo subjacente: o with fecha
+    with open(path, 'rb') as raw:
+        text = io.TextIOWrapper(_wrap_binary(raw, 'rb', compression), encoding=encoding, newline='')
+        try:
+            yield text
+        finally:
+            text.close()
+
+
+def _row_keys(chunk, key_columns):
+    """
+    Gera a chave de cada linha do bloco
+    """
+    columns = [chunk[c].fillna('').astype(str) if c in chunk.columns else pd.Series('', index=chunk.index)
+               for c in key_columns]
+    return list(zip(*columns))
+
+
+def _hash_key(key):
+    """
+    Resume a chave de uma notícia para o índice persistido
+    """
+    return hashlib.sha1('\x1f'.join(key).encode('utf-8')).hexdigest()
+
+
+def _scan_csv(path, key_columns, compression):
+    """
+    Lê em blocos as chaves e o cabeçalho de um CSV já exportado
+    """
+    keys = []
+    header = None
+    with _open_text_reader(path, compression) as fh:
+        for chunk in pd.read_csv(fh, chunksize=EXPORT_CHUNKSIZE, dtype=str, keep_default_na=False):
+            if header is None:
+                header = list(chunk.columns)
+            keys.extend(_row_keys(chunk, key_columns))
+
+    # Arquivo só com o cabeçalho não gera blocos
+    if header is None:
+        with _open_text_reader(path, compression) as fh:
+            header = list(pd.read_csv(fh, nrows=0).columns) or None
+    return keys, header
+
+
+def _scan_jsonl(path, key_columns, compression):
+    """
+    Lê linha a linha as chaves de um JSON Lines já exportado
+    """
+    keys = []
+    with _open_text_reader(path, compression, encoding='utf-8') as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            keys.append(tuple('' if record.get(c) is None else str(record[c]) for c in key_columns))
+    return keys, None
+
+
+def _index_paths(path):
+    """
+    Arquivos auxiliares: marca d'água (.idx) e chaves já exportadas (.keys)
+    """
+    return f"{path}.idx", f"{path}.keys"
+
+
+def _fingerprint(path, size):
+    """
+    Identifica o conteúdo confirmado do arquivo: inode e os bytes do início
+    e do fim da parte confirmada. Detecta arquivos substituídos por fora.
+    """
+    with open(path, 'rb') as fh:
+        head = fh.read(min(size, FINGERPRINT_BYTES))
+        fh.seek(max(0, size - FINGERPRINT_BYTES))
+        tail = fh.read(min(size, FINGERPRINT_BYTES))
+    return {'inode': os.stat(path).st_ino, 'head': head.hex(), 'tail': tail.hex()}
+
+
+def _read_index(path, index_path):
+    """
+    Lê o .idx e confere se ele ainda descreve o arquivo de dados
+    """
+    try:
+        with open(index_path, encoding='utf-8') as fh:
+            index = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if not os.path.exists(path) or os.path.getsize(path) < index.get('size', 0):
+        return None
+    if index.get('fingerprint') != _fingerprint(path, index['size']):
+        return None
+
+    return index
+
+
+def _rebuild_index(path, key_columns, compression, scan):
+    """
+    Monta o índice lendo o arquivo de dados inteiro (arquivos antigos,
+    substituídos por fora ou com o .keys perdido)
+    """
+    index_path, keys_path = _index_paths(path)
+    keys, header = [], None
+
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        keys, header = scan(path, key_columns, compression)
+    else:
+        _truncate(path, 0)
+
+    seen = set(_hash_key(key) for key in keys)
+    with open(keys_path, 'w', encoding='utf-8') as fh:
+        fh.writelines(f"{digest}\n" for digest in seen)
+
+    size = os.path.getsize(path)
+    index = {'size': size, 'keys_size': os.path.getsize(keys_path), 'rows': len(keys),
+             'header': header, 'fingerprint': _fingerprint(path, size)}
+    atomic_write_text(index_path, json.dumps(index))
+    return index, seen
+
+
+def _load_index(path, key_columns, compression, scan):
+    """
+    Carrega a marca d'água e o conjunto de chaves exportadas. Bytes além da
+    marca d'água (escrita interrompida) são descartados. Sem um índice que
+    confira com o arquivo, ou sem o .keys completo, o índice é refeito.
+    """
+    index_path, keys_path = _index_paths(path)
+    index = _read_index(path, index_path)
+
+    if index is not None:
+        _truncate(path, index['size'])
+        if os.path.exists(keys_path) and os.path.getsize(keys_path) >= index['keys_size']:
+            _truncate(keys_path, index['keys_size'])
+            with open(keys_path, encoding='utf-8') as fh:
+                seen = set(line.strip() for line in fh)
+            return index, seen
+
+    return _rebuild_index(path, key_columns, compression, scan)
+
+
+def _truncate(path, size):
+    """
+    Corta o arquivo no tamanho confirmado (cria se não existir)
+    """
+    with open(path, 'ab') as fh:
+        fh.truncate(size)
+
+
+def _rewrite_csv(path, header, compression):
+    """
+    Reescreve o CSV com um cabeçalho novo (colunas adicionadas), via arquivo
+    temporário + rename. Só acontece quando o formato dos dados muda.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            stream = _wrap_binary(raw, 'wb', compression)
+            text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+            pd.DataFrame(columns=header).to_csv(text, index=False)
+            if os.path.getsize(path) > 0:
+                with _open_text_reader(path, compression) as fh:
+                    for chunk in pd.read_csv(fh, chunksize=EXPORT_CHUNKSIZE, dtype=str, keep_default_na=False):
+                        chunk.reindex(columns=header).to_csv(text, index=False, header=False)
+            text.flush()
+            text.detach()
+            _finish_stream(stream, compression)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _new_rows(chunk, key_columns, seen, new_keys):
+    """
+    Filtra do bloco as linhas que ainda não foram exportadas
+    """
+    mask = []
+    for key in _row_keys(chunk, key_columns):
+        digest = _hash_key(key)
+        is_new = digest not in seen
+        mask.append(is_new)
+        if is_new:
+            seen.add(digest)
+            new_keys.append(digest)
+    return chunk[mask]
+
+
+def _append_export(path, key_columns, compression, scan, write_rows, encoding, columns=None):
+    """
+    Anexa apenas registros novos no fim do arquivo, sem reler nem copiar o
+    histórico. Ordem de escrita: dados, chaves e por fim a marca d'água
+    (troca atômica); se o processo cair no meio, a próxima exportação
+    corta o que passou da marca d'água. Se `columns` trouxer colunas que o
+    cabeçalho atual não tem, o arquivo é reescrito antes.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    index_path, keys_path = _index_paths(path)
+
+    with _export_lock:
+        index, seen = _load_index(path, key_columns, compression, scan)
+
+        if columns and index['header'] and set(columns) - set(index['header']):
+            header = index['header'] + [c for c in columns if c not in index['header']]
+            _rewrite_csv(path, header, compression)
+            index, seen = _rebuild_index(path, key_columns, compression, scan)
+
+        new_keys = []
+
+        with open(path, 'r+b') as raw:
+            raw.seek(index['size'])
+            stream = _wrap_binary(raw, 'wb', compression)
+            # Arquivo novo leva BOM para abrir corretamente no Excel
+            text = io.TextIOWrapper(stream, encoding=encoding if index['size'] == 0 else 'utf-8',
+                                    newline='')
+            written = write_rows(text, index, seen, new_keys)
+            text.flush()
+            text.detach()
+            _finish_stream(stream, compression)
+            raw.flush()
+            os.fsync(raw.fileno())
+            size = raw.tell()
+
+        with open(keys_path, 'a', encoding='utf-8') as fh:
+            fh.writelines(f"{digest}\n" for digest in new_keys)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        index.update({'size': size, 'keys_size': os.path.getsize(keys_path),
+                      'rows': index['rows'] + written, 'fingerprint': _fingerprint(path, size)})
+        atomic_write_text(index_path, json.dumps(index))
+
+    return written
+
+
+def _finish_stream(stream, compression):
+    """
+    Finaliza o frame do compressor sem fechar o arquivo de destino.
+    gzip e zstd aceitam vários frames concatenados no mesmo arquivo.
+    """
+    if compression == 'gzip':
+        # GzipFile criado com fileobj não fecha o arquivo subjacente
+        stream.close()
+    elif compression == 'zstd':
+        import zstandard
+        stream.flush(zstandard.FLUSH_FRAME)
+
+
+def export_csv(source, path, key_columns=DEFAULT_KEY_COLUMNS, compression=None,
+               chunksize=EXPORT_CHUNKSIZE):
+    """
+    Exporta para CSV em blocos, anexando apenas notícias novas
+    """
+    compression = _infer_compression(path, compression)
+
+    def write_rows(fh, index, seen, new_keys):
+        written = 0
+        for chunk in iter_chunks(source, chunksize):
+            new_rows = _new_rows(chunk, key_columns, seen, new_keys)
+            if new_rows.empty:
+                continue
+            if index['header'] is None:
+                index['header'] = list(new_rows.columns)
+                new_rows.to_csv(fh, index=False)
+            else:
+                new_rows.reindex(columns=index['header']).to_csv(fh, index=False, header=False)
+            written += len(new_rows)
+        return written
+
+    return _append_export(path, key_columns, compression, _scan_csv, write_rows, 'utf-8-sig',
+                          columns=_source_columns(source))
+
+
+def export_jsonl(source, path, key_columns=DEFAULT_KEY_COLUMNS, compression=None,
+                 chunksize=EXPORT_CHUNKSIZE):
+    """
+    Exporta para JSON Lines em blocos, anexando apenas notícias novas
+    """
+    compression = _infer_compression(path, compression)
+
+    def write_rows(fh, index, seen, new_keys):
+        written = 0
+        for chunk in iter_chunks(source, chunksize):
+            new_rows = _new_rows(chunk, key_columns, seen, new_keys)
+            if new_rows.empty:
+                continue
+            lines = new_rows.to_json(orient='records', lines=True, force_ascii=False, date_format='iso')
+            fh.write(lines.rstrip('\n') + '\n')
+            written += len(new_rows)
+        return written
+
+    return _append_export(path, key_columns, compression, _scan_jsonl, write_rows, 'utf-8')
+
+
+def export_json(source, path, metadata, chunksize=EXPORT_CHUNKSIZE):
+    """
+    Gera o JSON com metadados (formato do entregável) escrevendo os
+    registros bloco a bloco, sem montar a lista inteira em memória
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write('{"metadata": ')
+            json.dump(metadata, fh, ensure_ascii=False)
+            fh.write(', "data": [')
+
+            first = True
+            for chunk in iter_chunks(source, chunksize):
+                if chunk.empty:
+                    continue
+                records = chunk.to_json(orient='records', force_ascii=False, date_format='iso')
+                if not first:
+                    fh.write(',')
+                fh.write(records[1:-1])
+                first = False
+
+            fh.write(']}\n')
+
+        os.replace(tmp_path, path)
+
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def export_deliverables(df):
+    """
+    Gera os arquivos de output obrigatórios do case a partir do lote processado
+    """
+    try:
+        # 1. CSV (ENTREGÁVEL OBRIGATÓRIO): anexa só notícias novas
+        new_rows = export_csv(df, CSV_PATH)
+        print(f"✅ CSV salvo: {CSV_PATH} ({new_rows} novas)")
+
+        # 2. JSON Lines: histórico incremental
+        export_jsonl(df, JSONL_PATH)
+        print(f"✅ JSONL salvo: {JSONL_PATH}")
+
+        # 3. JSON (opcional) no formato do case
+        metadata = {
+            "generated_at": datetime.now().isoformat(),
+            "total_news": len(df),
+            "source": "Google News RSS",
+            "query": "Inteligência Artificial Piauí"
+        }
+        with _export_lock:
+            export_json(df, JSON_PATH, metadata)
+        print(f"✅ JSON salvo: {JSON_PATH}")
+
+        return CSV_PATH, JSON_PATH
+
+    except Exception as e:
+        print(f"❌ Erro ao gerar arquivos: {e}")
+        return None, None
@@ -0,0 +1,104 @@
+import os
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+
+try:
+    from src.utils import atomic_write_text
+except ImportError:
+    from utils import atomic_write_text
+
+# Pasta compartilhada pelos processos do dashboard
+SNAPSHOT_DIR = os.environ.get("IAPIAUI_SNAPSHOT_DIR", "data/snapshots")
+
+# Arquivo que aponta para o snapshot vigente
+CURRENT_FILE = "CURRENT"
+
+# Quantos snapshots antigos manter (réplicas podem ainda estar lendo)
+KEEP_SNAPSHOTS = 3
+
+
+def publish_snapshot(df, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Publica o DataFrame como um snapshot Arrow versionado e
+    troca o ponteiro CURRENT de forma atômica. Retorna a versão.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    version = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    path = os.path.join(snapshot_dir, f"snapshot-{version}.arrow")
+
+    # Arquivo IPC sem compressão: pode ser mapeado em memória sem cópia
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    atomic_write_text(os.path.join(snapshot_dir, CURRENT_FILE), version)
+    _cleanup_snapshots(snapshot_dir)
+
+    print(f"📦 Snapshot publicado: {path}")
+    return version
+
+
+def _cleanup_snapshots(snapshot_dir):
+    """
+    Remove snapshots antigos. Processos que ainda mapeiam um arquivo
+    removido continuam lendo normalmente até liberá-lo.
+    """
+    snapshots = sorted(
+        name for name in os.listdir(snapshot_dir)
+        if name.startswith('snapshot-') and name.endswith('.arrow')
+    )
+    for name in snapshots[:-KEEP_SNAPSHOTS]:
+        try:
+            os.remove(os.path.join(snapshot_dir, name))
+        except OSError:
+            pass
+
+
+def current_snapshot_version(snapshot_dir=SNAPSHOT_DIR):
+    """
+    Retorna a versão do snapshot vigente, ou None se não houver
+    """
+    try:
+        with open(os.path.join(snapshot_dir, CURRENT_FILE), encoding='utf-8') as fh:
+            version = fh.read().strip()
+    except FileNotFoundError:
+        return None
+
+    if not os.path.exists(os.path.join(snapshot_dir, f"snapshot-{version}.arrow")):
+        return None
+
+    return version or None
+
+
+def _types_mapper(arrow_type):
+    """
+    Mantém textos como arrays Arrow (sem converter para objetos Python)
+    """
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def read_snapshot(version, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Mapeia o snapshot em memória e devolve um DataFrame apoiado nele.
+    Todos os processos que leem a mesma versão compartilham as
+    mesmas páginas do cache do sistema operacional.
+    """
+    path = os.path.join(snapshot_dir, f"snapshot-{version}.arrow")
+    source = pa.memory_map(path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(types_mapper=_types_mapper)
@@ -0,0 +1,52 @@
+import os
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+
+def atomic_write_csv(df, path, **kwargs):
+    """
+    Salva o DataFrame em CSV de forma atômica (arquivo temporário + rename),
+    para que leitores nunca vejam um arquivo pela metade
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        df.to_csv(tmp_path, index=False, **kwargs)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path, text):
+    """
+    Escreve um arquivo de texto de forma atômica (arquivo temporário + rename)
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(text)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def parse_pub_dates(pub_dates):
+    """
+    Converte as datas RFC 822 do RSS para dias (sem fuso); datas
+    inválidas viram o dia atual
+    """
+    dates = pd.to_datetime(pub_dates, format='%a, %d %b %Y %H:%M:%S %Z',
+                           errors='coerce', utc=True).dt.tz_localize(None)
+    return dates.fillna(pd.Timestamp(datetime.now())).dt.normalize()
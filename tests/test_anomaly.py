@@ -0,0 +1,51 @@
+import json
+
+import pandas as pd
+
+from src.anomaly import load_state, update_anomalies
+
+
+def _negatives(day, source, count, query='IA Piauí'):
+    return pd.DataFrame({'data': pd.to_datetime([day] * count), 'sentiment': ['negativo'] * count,
+                         'source': [source] * count, 'search_query': [query] * count})
+
+
+def _run(tmp_path, df):
+    return update_anomalies(df, state_path=str(tmp_path / 'state.json'),
+                            feed_path=str(tmp_path / 'feed.json'))
+
+
+def _spike_batches(source):
+    quiet = [_negatives(f'2025-01-{day:02d}', source, 1) for day in range(1, 11)]
+    return quiet + [_negatives('2025-01-11', source, 10), _negatives('2025-01-12', source, 1)]
+
+
+def test_source_with_pipe_keeps_query_and_source(tmp_path):
+    for batch in _spike_batches('G1 | Piauí'):
+        feed = _run(tmp_path, batch)
+
+    alerts = [item for item in feed if item['source'] == 'G1 | Piauí']
+    assert [(a['day'], a['query']) for a in alerts] == [('2025-01-11', 'IA Piauí')]
+    assert ('IA Piauí', 'G1 | Piauí') in load_state(str(tmp_path / 'state.json'))
+
+
+def test_lost_state_does_not_duplicate_feed(tmp_path):
+    batches = _spike_batches('G1')
+    for batch in batches:
+        _run(tmp_path, batch)
+
+    # Estado perdido: o mesmo histórico é processado de novo
+    (tmp_path / 'state.json').unlink()
+    for batch in batches:
+        feed = _run(tmp_path, batch)
+
+    keys = [(item['day'], item['query'], item['source']) for item in feed]
+    assert len(keys) == len(set(keys))
+
+
+def test_corrupted_state_starts_empty(tmp_path):
+    (tmp_path / 'state.json').write_text('{"series": [', encoding='utf-8')
+    (tmp_path / 'feed.json').write_text('[{"day"', encoding='utf-8')
+
+    assert _run(tmp_path, _negatives('2025-01-01', 'G1', 1)) == []
+    assert len(json.loads((tmp_path / 'state.json').read_text(encoding='utf-8'))['series']) == 2
@@ -0,0 +1,88 @@
+import gzip
+import os
+
+import pandas as pd
+
+from src.export import export_csv, export_jsonl
+
+
+def _news(*pairs):
+    return pd.DataFrame({'title': [t for t, _ in pairs], 'link': [l for _, l in pairs]})
+
+
+def _read_csv(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def test_appends_only_new_rows(tmp_path):
+    path = str(tmp_path / 'news.csv')
+
+    assert export_csv(_news(('a', '1'), ('b', '2')), path) == 2
+    assert export_csv(_news(('a', '1'), ('b', '2')), path) == 0
+    assert export_csv(_news(('b', '2'), ('c', '3')), path) == 1
+
+    assert _read_csv(path)['title'].tolist() == ['a', 'b', 'c']
+
+
+def test_gzip_appends_are_readable(tmp_path):
+    path = str(tmp_path / 'news.jsonl.gz')
+
+    export_jsonl(_news(('a', '1')), path)
+    export_jsonl(_news(('a', '1'), ('b', '2')), path)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        assert len(fh.read().splitlines()) == 2
+
+
+def test_interrupted_write_is_truncated(tmp_path):
+    path = str(tmp_path / 'news.csv')
+    export_csv(_news(('a', '1')), path)
+
+    # Simula uma escrita que caiu antes de atualizar a marca d'água
+    with open(path, 'a', encoding='utf-8') as fh:
+        fh.write('lixo,parc')
+
+    assert export_csv(_news(('b', '2')), path) == 1
+    assert _read_csv(path)['title'].tolist() == ['a', 'b']
+
+
+def test_missing_keys_file_does_not_duplicate_rows(tmp_path):
+    path = str(tmp_path / 'news.csv')
+    export_csv(_news(('a', '1'), ('b', '2')), path)
+
+    os.remove(path + '.keys')
+
+    assert export_csv(_news(('a', '1'), ('b', '2'), ('c', '3')), path) == 1
+    assert _read_csv(path)['title'].tolist() == ['a', 'b', 'c']
+    with open(path + '.keys', 'rb') as fh:
+        assert b'\x00' not in fh.read()
+
+
+def test_file_replaced_by_larger_file_is_rescanned(tmp_path):
+    path = str(tmp_path / 'news.csv')
+    export_csv(_news(('a', '1')), path)
+
+    # Outro processo reescreve o arquivo inteiro, maior que a marca d'água
+    _news(('x', '9'), ('y', '8'), ('z', '7')).to_csv(path, index=False)
+
+    assert export_csv(_news(('z', '7'), ('w', '6')), path) == 1
+    assert _read_csv(path)['title'].tolist() == ['x', 'y', 'z', 'w']
+
+
+def test_new_column_rewrites_header(tmp_path):
+    path = str(tmp_path / 'news.csv')
+    export_csv(_news(('a', '1')), path)
+
+    export_csv(_news(('b', '2')).assign(search_query='IA Piauí'), path)
+
+    df = _read_csv(path)
+    assert df.columns.tolist() == ['title', 'link', 'search_query']
+    assert df['search_query'].tolist() == ['', 'IA Piauí']
+
+
+def test_existing_file_without_index(tmp_path):
+    path = str(tmp_path / 'news.csv')
+    _news(('a', '1')).to_csv(path, index=False)
+
+    assert export_csv(_news(('a', '1'), ('b', '2')), path) == 1
+    assert _read_csv(path)['title'].tolist() == ['a', 'b']